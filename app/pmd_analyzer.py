@@ -1,27 +1,186 @@
 import argparse
+import hashlib
+import io
 import json
 import os
 import shutil
 import subprocess
+import threading
 import time
 import logging
+from collections import Counter
 from pathlib import Path
+import requests
 from git import Repo, GitCommandError
 
+try:
+    import ijson  # 설치되어 있으면 가장 빠른 백엔드(yajl2_c 등)를 자동 선택
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # C 구현 직렬화기. 없으면 표준 json으로 대체
+except ImportError:
+    orjson = None
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def count_java_files(directory):
-    """지정된 디렉토리 내의 .java 파일 개수를 셉니다."""
+def iter_pmd_rule_names(report_file):
+    """PMD JSON 리포트(바이너리 모드 파일 객체)의 violation마다 rule 이름을 하나씩 반환합니다.
+
+    ijson이 있으면 리포트 전체를 메모리에 올리지 않고 rule 필드만 스트리밍으로 추출합니다.
+    없으면 orjson(C 파서), 그것도 없으면 표준 json으로 한 번에 파싱합니다.
+    """
+    if ijson is not None:
+        yield from ijson.items(report_file, 'files.item.violations.item.rule')
+        return
+    report = orjson.loads(report_file.read()) if orjson is not None else json.load(report_file)
+    for file_report in report.get('files', []):
+        for violation in file_report.get('violations', []):
+            yield violation.get('rule')
+
+
+JSON_PARSE_ERRORS = (json.JSONDecodeError,) + ((ijson.JSONError,) if ijson is not None else ())
+
+
+def list_commits(repo, rev):
+    """rev 이력을 오래된 순으로 (해시, 루트 트리 해시, 부모 해시 리스트, 요약) 튜플 리스트로 반환합니다.
+
+    iter_commits는 Commit 객체마다 parents/summary를 읽을 때 cat-file 왕복이 생기므로
+    git log 한 번의 출력에서 필요한 필드만 파싱합니다.
+    """
+    commits = []
+    for line in repo.git.log(rev, '--reverse', '--format=%H%x00%T%x00%P%x00%s').split('\n'):
+        if line:
+            commit_hash, tree_hash, parents, summary = line.split('\0', 3)
+            commits.append((commit_hash, tree_hash, parents.split(), summary))
+    return commits
+
+
+def get_java_touching_commits(repo, rev):
+    """rev 이력에서 .java 파일을 변경한 커밋 해시 집합을 git log 한 번으로 구합니다.
+
+    --full-history로 이력 단순화를 끄므로, 여기에 없는 단일 부모 커밋은 .java 변경이 없습니다.
+    """
+    return set(repo.git.log(rev, '--full-history', '--format=%H', '--', '*.java').split())
+
+
+def java_tree_key(repo, commit_hash):
+    """커밋의 .java 파일 목록(경로와 blob 해시)을 요약한 키와 .java 파일 수를 반환합니다.
+
+    두 커밋의 키가 같으면 PMD가 보는 소스가 동일하므로 분석 결과도 같습니다.
+    파일 수도 같은 ls-tree 출력에서 세므로 체크아웃 후 작업 트리를 다시 셀 필요가 없습니다.
+    """
+    h = hashlib.blake2b(digest_size=20)
     count = 0
-    for _, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".java"):
-                count += 1
-    return count
-
-def run_pmd(pmd_path, project_dir, ruleset_path, output_file):
-    """PMD를 실행하고 결과를 JSON 파일로 저장합니다."""
+    for line in repo.git.ls_tree('-r', commit_hash).splitlines():
+        if line.endswith('.java'):
+            h.update(line.encode('utf-8', 'surrogateescape'))
+            h.update(b'\n')
+            count += 1
+    return h.hexdigest(), count
+
+
+def link_or_copy(src, dst):
+    """동일한 결과 파일을 다시 쓰지 않도록 하드 링크를 만들고, 불가능하면 복사합니다."""
+    try:
+        if dst.exists():
+            dst.unlink()
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def summarize_pmd_report(output_file, report_bytes=None):
+    """PMD JSON 리포트 파일에서 전체 경고 수와 룰별 경고 수를 집계합니다.
+
+    report_bytes가 주어지면 방금 쓴 파일을 다시 열지 않고 메모리의 리포트를 그대로 집계합니다.
+    """
+    warnings_count = 0
+    warnings_by_rule = Counter()
+    if report_bytes is not None:
+        source = io.BytesIO(report_bytes) if report_bytes else None
+    elif output_file.exists() and output_file.stat().st_size > 0:
+        source = open(output_file, 'rb')
+    else:
+        source = None
+    if source is not None:
+        try:
+            # rule 이름 리스트를 만들지 않고 스트리밍하면서 바로 집계
+            # (파싱 도중 실패하면 일부만 센 값이 남지 않도록 끝까지 읽은 뒤에 반영)
+            count = 0
+            by_rule = Counter()
+            with source as f:
+                for name in iter_pmd_rule_names(f):
+                    count += 1
+                    if name:
+                        by_rule[name] += 1
+            warnings_count = count
+            warnings_by_rule = by_rule
+            logging.info(f"PMD found {warnings_count} warnings.")
+
+        except JSON_PARSE_ERRORS:
+            logging.error(f"Failed to parse PMD output JSON: {output_file}")
+            return False, 0, {} # 파싱 실패
+        except Exception as e:
+            logging.error(f"Error processing PMD results for {output_file}: {e}")
+            return False, 0, {}
+    else:
+        logging.info("PMD ran successfully, but no violations found or output file is empty.")
+
+    return True, warnings_count, warnings_by_rule
+
+
+def run_capturing_tail(cmd, tail_bytes=4096, env=None):
+    """cmd를 실행하고 stdout/stderr는 각각 마지막 tail_bytes 바이트만 보관합니다.
+
+    PMD 로그가 아무리 길어도 커밋당 메모리 사용량이 tail_bytes 수준으로 제한됩니다.
+    """
+    def drain(stream, sink):
+        buf = bytearray()
+        for chunk in iter(lambda: stream.read1(8192), b''):
+            buf += chunk
+            if len(buf) > tail_bytes:
+                del buf[:-tail_bytes]
+        sink.append(buf.decode('utf-8', errors='ignore'))
+
+    stdout_tail, stderr_tail = [], []
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env) as proc:
+        readers = [threading.Thread(target=drain, args=(proc.stdout, stdout_tail)),
+                   threading.Thread(target=drain, args=(proc.stderr, stderr_tail))]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        returncode = proc.wait()
+    return subprocess.CompletedProcess(cmd, returncode, stdout_tail[0], stderr_tail[0])
+
+
+def pmd_java_env(cds_archive):
+    """PMD 실행 스크립트가 읽는 PMD_JAVA_OPTS에 단기 실행용 JVM 옵션과 AppCDS(Class Data Sharing) 옵션을 추가한 환경을 반환합니다.
+
+    커밋마다 JVM을 새로 띄우므로 C2 컴파일러(-XX:TieredStopAtLevel=1)와 병렬 GC 스레드(-XX:+UseSerialGC)를 쓰지 않아
+    기동·종료 비용을 줄입니다. 사용자가 PMD_JAVA_OPTS로 준 값이 뒤에 오므로 같은 옵션은 사용자 값이 우선합니다.
+    첫 실행은 로드한 클래스를 cds_archive에 덤프하고(-XX:ArchiveClassesAtExit, JDK 13+),
+    이후 실행은 그 아카이브를 매핑해 커밋마다 반복되는 JVM 클래스 로딩 시간을 줄입니다.
+    """
+    if cds_archive.exists():
+        cds_opt = f"-XX:SharedArchiveFile={cds_archive}"
+    else:
+        cds_opt = f"-XX:ArchiveClassesAtExit={cds_archive}"
+    # 옵션을 모르는 오래된 JVM에서도 PMD 실행이 실패하지 않도록 함
+    java_opts = (f"-XX:+IgnoreUnrecognizedVMOptions -XX:TieredStopAtLevel=1 -XX:+UseSerialGC "
+                 f"{os.environ.get('PMD_JAVA_OPTS', '')} {cds_opt}")
+    return {**os.environ, 'PMD_JAVA_OPTS': java_opts}
+
+
+def run_pmd(pmd_path, project_dir, ruleset_path, output_file, cache_file=None, cds_archive=None):
+    """PMD를 실행하고 결과를 JSON 파일로 저장합니다.
+
+    cache_file이 주어지면 PMD 증분 분석 캐시를 사용하여 변경되지 않은 파일의 재분석을 건너뜁니다.
+    cds_archive가 주어지면 단기 실행용 JVM 옵션과 클래스 데이터 공유 아카이브로 시작 시간을 줄입니다.
+    """
     cmd = [
         pmd_path, 'check',
         '--dir', str(project_dir),
@@ -29,40 +188,18 @@ def run_pmd(pmd_path, project_dir, ruleset_path, output_file):
         '--format', 'json',
         '--report-file', str(output_file)
     ]
+    if cache_file is not None:
+        cmd += ['--cache', str(cache_file)]
     logging.info(f"Running PMD: {' '.join(cmd)}")
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False, encoding='utf-8', errors='ignore')
+        result = run_capturing_tail(cmd, env=pmd_java_env(cds_archive) if cds_archive is not None else None)
         if result.returncode != 0 and result.returncode != 4:
             logging.error(f"PMD execution failed with return code {result.returncode}")
             logging.error(f"Stderr: {result.stderr}")
             logging.error(f"Stdout: {result.stdout}")
             return False, 0, {}
 
-        warnings_count = 0
-        warnings_by_rule = {}
-        if output_file.exists() and output_file.stat().st_size > 0:
-             try:
-                 with open(output_file, 'r', encoding='utf-8') as f:
-                     pmd_result = json.load(f)
-
-                 for file_report in pmd_result.get('files', []):
-                     for violation in file_report.get('violations', []):
-                         warnings_count += 1
-                         rule_name = violation.get('rule')
-                         if rule_name:
-                             warnings_by_rule[rule_name] = warnings_by_rule.get(rule_name, 0) + 1
-                 logging.info(f"PMD found {warnings_count} warnings.")
-
-             except json.JSONDecodeError:
-                 logging.error(f"Failed to parse PMD output JSON: {output_file}")
-                 return False, 0, {} # 파싱 실패
-             except Exception as e:
-                 logging.error(f"Error processing PMD results for {output_file}: {e}")
-                 return False, 0, {}
-        else:
-            logging.info("PMD ran successfully, but no violations found or output file is empty.")
-
-        return True, warnings_count, warnings_by_rule
+        return summarize_pmd_report(output_file)
 
     except FileNotFoundError:
         logging.error(f"PMD executable not found at: {pmd_path}")
@@ -72,12 +209,39 @@ def run_pmd(pmd_path, project_dir, ruleset_path, output_file):
         return False, 0, {}
 
 
-def analyze_repository(repo_location, output_dir, pmd_path, ruleset_path):
-    """Git 저장소를 분석하고 PMD 결과를 수집 및 요약합니다."""
+def run_pmd_daemon(daemon_url, project_dir, ruleset_path, output_file, timeout=600):
+    """상시 실행 중인 PMD 데몬(/analyze)에 분석을 요청하고 결과를 JSON 파일로 저장합니다.
+
+    커밋마다 PMD JVM을 새로 띄우지 않으므로 JVM 기동 비용이 한 번만 발생합니다.
+    """
+    payload = {"path": str(project_dir), "ruleset": str(ruleset_path)}
+    logging.info(f"Requesting PMD daemon analysis: {daemon_url} ({project_dir})")
+    try:
+        resp = requests.post(daemon_url, json=payload, timeout=timeout)
+        resp.raise_for_status()
+    except requests.RequestException as e:
+        logging.error(f"PMD daemon request failed: {e}")
+        return False, 0, {}
+
+    output_file.write_bytes(resp.content)
+    return summarize_pmd_report(output_file, report_bytes=resp.content)
+
+
+def analyze_repository(repo_location, output_dir, pmd_path, ruleset_path, daemon_url=None):
+    """Git 저장소를 분석하고 PMD 결과를 수집 및 요약합니다.
+
+    커밋을 순차적으로 처리하는 기준(reference) 구현입니다. worktree 기반 병렬 분석은
+    pmd_analyzer_parallel.py의 analyze_repository_parallel을 사용하세요.
+    daemon_url이 주어지면 PMD CLI 대신 PMD 데몬에 분석을 요청합니다.
+    """
     start_time_total = time.time()
     repo_path = Path(output_dir) / 'repo'
     results_path = Path(output_dir) / 'pmd_results'
     summary_file = Path(output_dir) / 'summary.json'
+    # PMD 증분 분석 캐시: 전체 실행 동안 공유하며, output_dir에 남겨 다음 실행에서도 재사용
+    pmd_cache_file = Path(output_dir) / 'pmd.cache'
+    # JVM 클래스 데이터 공유 아카이브: 첫 PMD 실행에서 생성되고 이후 실행의 JVM 시작을 단축
+    pmd_cds_archive = Path(output_dir).resolve() / 'pmd-cds.jsa'
 
     # 출력 디렉토리 생성
     results_path.mkdir(parents=True, exist_ok=True)
@@ -86,52 +250,103 @@ def analyze_repository(repo_location, output_dir, pmd_path, ruleset_path):
     original_branch = None
     try:
         # 저장소 클론 또는 열기
-        if repo_path.exists():
+        if (repo_path / '.git').is_dir():
             logging.info(f"Repository already exists at {repo_path}. Opening...")
             repo = Repo(repo_path)
             original_branch = repo.active_branch
             logging.info("Fetching latest changes...")
             repo.remotes.origin.fetch()
+            # 재클론 대신 가져온 원격 기본 브랜치로 맞춤 (변경분만 네트워크로 전송)
+            repo.git.reset('--hard', 'origin/HEAD')
         else:
+            if repo_path.exists():
+                logging.warning(f"Path {repo_path} exists but is not a valid git repo. Removing.")
+                shutil.rmtree(repo_path)
             logging.info(f"Cloning repository from {repo_location} to {repo_path}...")
-            repo = Repo.clone_from(repo_location, repo_path)
+            # 분석 대상은 기본 브랜치 이력뿐이므로 다른 브랜치와 태그는 받지 않음
+            repo = Repo.clone_from(repo_location, repo_path, multi_options=['--single-branch', '--no-tags'])
             original_branch = repo.active_branch
             logging.info("Repository cloned successfully.")
 
+        # PMD는 .java 파일만 읽으므로 작업 트리에는 .java 파일만 체크아웃
+        repo.git.sparse_checkout('set', '--no-cone', '*.java')
+
         # 커밋 목록 가져오기
-        commits = list(repo.iter_commits(rev=original_branch, reverse=True))
+        commits = list_commits(repo, original_branch)
         num_commits = len(commits)
         logging.info(f"Found {num_commits} commits to analyze.")
 
-        all_java_files_counts = []
-        all_warnings_counts = []
-        total_warnings_by_rule = {}
+        # .java 파일을 변경한 커밋을 한 번의 git log로 미리 구함
+        java_touching_commits = get_java_touching_commits(repo, original_branch)
+        logging.info(f"{len(java_touching_commits)} of {num_commits} commits touch .java files.")
+
+        # 커밋별 값을 리스트로 모으지 않고 합계만 한 번에 누적
+        total_java_files = 0
+        java_counted_commits = 0
+        total_warnings = 0
+        total_warnings_by_rule = Counter()
         processed_commits = 0
+        # .java 트리 키 -> (java 파일 수, 결과 파일, 경고 수, 룰별 경고 수)
+        results_by_java_tree = {}
+        # 커밋 해시 -> (.java 트리 키, java 파일 수)
+        java_key_by_commit = {}
+        # 루트 트리 해시 -> (.java 트리 키, java 파일 수): 트리가 같은 커밋(빈 커밋, 되돌리기 등)은 ls-tree 생략
+        java_key_by_tree = {}
+        duplicate_commits = 0
 
         # 각 커밋 처리
-        for i, commit in enumerate(commits):
-            commit_hash = commit.hexsha
+        for i, (commit_hash, tree_hash, parents, summary) in enumerate(commits):
             commit_time_start = time.time()
-            logging.info(f"Processing commit {i+1}/{num_commits}: {commit_hash[:8]} ({commit.summary})")
+            logging.info(f"Processing commit {i+1}/{num_commits}: {commit_hash[:8]} ({summary})")
 
             try:
-                # 해당 커밋으로 체크아웃
-                repo.git.checkout(commit_hash, force=True)
-                logging.debug(f"Checked out commit {commit_hash[:8]}")
-
-                # Java 파일 수 계산
-                java_files_count = count_java_files(repo_path)
-                all_java_files_counts.append(java_files_count)
-                logging.debug(f"Found {java_files_count} Java files.")
-
-                # PMD 실행 및 결과 저장
                 commit_output_file = results_path / f"{commit_hash}.json"
-                pmd_success, warnings_count, warnings_by_rule = run_pmd(pmd_path, repo_path, ruleset_path, commit_output_file)
+
+                # .java 트리가 이미 분석한 커밋과 같으면 체크아웃과 PMD 실행을 건너뛰고 결과를 재사용
+                if (commit_hash not in java_touching_commits and len(parents) == 1
+                        and parents[0] in java_key_by_commit):
+                    # .java 변경이 없는 커밋: 부모와 같은 트리이므로 ls-tree 생략
+                    java_key, tree_java_files = java_key_by_commit[parents[0]]
+                elif tree_hash in java_key_by_tree:
+                    java_key, tree_java_files = java_key_by_tree[tree_hash]
+                else:
+                    java_key, tree_java_files = java_tree_key(repo, commit_hash)
+                    java_key_by_tree[tree_hash] = (java_key, tree_java_files)
+                java_key_by_commit[commit_hash] = (java_key, tree_java_files)
+                cached = results_by_java_tree.get(java_key)
+                if cached is not None:
+                    java_files_count, cached_output_file, warnings_count, warnings_by_rule = cached
+                    if cached_output_file.exists():
+                        link_or_copy(cached_output_file, commit_output_file)
+                    pmd_success = True
+                    duplicate_commits += 1
+                    logging.info(f"Java sources identical to {cached_output_file.stem[:8]}. Reusing PMD results.")
+                else:
+                    # 해당 커밋으로 체크아웃
+                    repo.git.checkout(commit_hash, force=True, quiet=True)
+                    logging.debug(f"Checked out commit {commit_hash[:8]}")
+
+                    # Java 파일 수는 java_tree_key의 ls-tree 결과로 이미 계산됨
+                    java_files_count = tree_java_files
+                    logging.debug(f"Found {java_files_count} Java files.")
+
+                    # PMD 실행 및 결과 저장
+                    if daemon_url:
+                        pmd_success, warnings_count, warnings_by_rule = run_pmd_daemon(
+                            daemon_url, repo_path.resolve(), Path(ruleset_path).resolve(), commit_output_file)
+                    else:
+                        pmd_success, warnings_count, warnings_by_rule = run_pmd(
+                            pmd_path, repo_path, ruleset_path, commit_output_file, cache_file=pmd_cache_file,
+                            cds_archive=pmd_cds_archive)
+                    if pmd_success:
+                        results_by_java_tree[java_key] = (java_files_count, commit_output_file,
+                                                          warnings_count, warnings_by_rule)
+                total_java_files += java_files_count
+                java_counted_commits += 1
 
                 if pmd_success:
-                    all_warnings_counts.append(warnings_count)
-                    for rule, count in warnings_by_rule.items():
-                        total_warnings_by_rule[rule] = total_warnings_by_rule.get(rule, 0) + count
+                    total_warnings += warnings_count
+                    total_warnings_by_rule.update(warnings_by_rule)
                     processed_commits += 1
                 else:
                     logging.warning(f"Skipping statistics for commit {commit_hash[:8]} due to PMD error.")
@@ -157,12 +372,13 @@ def analyze_repository(repo_location, output_dir, pmd_path, ruleset_path):
 
         # 최종 요약 통계 계산
         if processed_commits > 0:
-            avg_java_files = sum(all_java_files_counts) / len(all_java_files_counts) if all_java_files_counts else 0
-            avg_warnings = sum(all_warnings_counts) / processed_commits if processed_commits > 0 else 0
+            avg_java_files = total_java_files / java_counted_commits if java_counted_commits else 0
+            avg_warnings = total_warnings / processed_commits if processed_commits > 0 else 0
             summary_data = {
                 "location": repo_location,
                 "stat_of_repository": {
                     "number_of_commits_analyzed": processed_commits,
+                    "number_of_duplicate_commits": duplicate_commits,
                     "total_commits_in_repo": num_commits,
                     "avg_of_num_java_files": round(avg_java_files, 2),
                     "avg_of_num_warnings": round(avg_warnings, 2),
@@ -174,6 +390,7 @@ def analyze_repository(repo_location, output_dir, pmd_path, ruleset_path):
                 "location": repo_location,
                 "stat_of_repository": {
                     "number_of_commits_analyzed": 0,
+                    "number_of_duplicate_commits": 0,
                     "total_commits_in_repo": num_commits,
                     "avg_of_num_java_files": 0,
                     "avg_of_num_warnings": 0,
@@ -184,8 +401,12 @@ def analyze_repository(repo_location, output_dir, pmd_path, ruleset_path):
 
 
         # 요약 파일 저장 (R8 충족)
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, indent=4, ensure_ascii=False)
+        if orjson is not None:
+            # orjson은 항상 UTF-8로 쓰고 비ASCII를 이스케이프하지 않으므로 ensure_ascii=False와 동일
+            Path(summary_file).write_bytes(orjson.dumps(summary_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(summary_file, 'w', encoding='utf-8') as f:
+                json.dump(summary_data, f, indent=4, ensure_ascii=False)
         logging.info(f"Summary report saved to {summary_file}")
 
     except GitCommandError as e:
@@ -218,16 +439,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyze Git repository history with PMD.")
     parser.add_argument("repo_location", help="URL or local path of the Git repository (must be a Java project).") # R5
     parser.add_argument("-o", "--output-dir", default="analysis_results", help="Directory to store PMD results and summary. (Default: analysis_results)") # R7 (Optional Parameter)
-    parser.add_argument("-p", "--pmd-path", required=True, help="Path to the PMD executable (e.g., '/path/to/pmd-bin-X.Y.Z/bin/pmd' or 'pmd.bat').")
+    pmd_group = parser.add_mutually_exclusive_group(required=True)
+    pmd_group.add_argument("-p", "--pmd-path", help="Path to the PMD executable (e.g., '/path/to/pmd-bin-X.Y.Z/bin/pmd' or 'pmd.bat').")
+    pmd_group.add_argument("--daemon-url", help="URL of a running PMD daemon (e.g., 'http://localhost:8000/analyze'). Avoids one JVM start per commit.")
     parser.add_argument("-r", "--ruleset", required=True, help="Path to the PMD ruleset XML file.") # R9
 
     args = parser.parse_args()
 
-    if not Path(args.pmd_path).exists():
+    if args.pmd_path and not Path(args.pmd_path).exists():
         print(f"Error: PMD executable not found at '{args.pmd_path}'")
         exit(1)
     if not Path(args.ruleset).exists():
         print(f"Error: PMD ruleset file not found at '{args.ruleset}'")
         exit(1)
 
-    analyze_repository(args.repo_location, args.output_dir, args.pmd_path, args.ruleset)
\ No newline at end of file
+    analyze_repository(args.repo_location, args.output_dir, args.pmd_path, args.ruleset, daemon_url=args.daemon_url)
\ No newline at end of file
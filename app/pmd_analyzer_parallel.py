@@ -5,33 +5,61 @@ import json
 import time
 import os
 import shutil
+import fcntl
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from multiprocessing import Pool, Manager, current_process
+from multiprocessing import current_process, get_all_start_methods, get_context
 from datetime import datetime
 import requests
-from typing import List
+from typing import Dict, List, Tuple
 import hashlib
 
+try:
+    import ijson  # 설치되어 있으면 가장 빠른 백엔드(yajl2_c 등)를 자동 선택
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # C 구현 직렬화기. 없으면 표준 json으로 대체
+except ImportError:
+    orjson = None
+
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - [%(processName)s] - %(message)s',
                     datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
-file_cache = Manager().dict()
+# Pool initializer(init_worker)가 채우는 워커 공통 설정
+_WORKER = {}
+
+# git이 fsync가 필요한 optional lock(index refresh 등)을 잡지 않도록 모든 git 호출에 적용
+# 일회용 worktree에서는 hook·fsmonitor가 필요 없으므로 끄고, 인덱스 stat 검사는 병렬로 수행
+# (GIT_CONFIG_COUNT/KEY/VALUE는 모든 git 명령에 -c 를 붙인 것과 같음)
+_GIT_CONFIG = {
+    'core.hooksPath': '/dev/null',
+    'core.fsmonitor': 'false',
+    'core.preloadIndex': 'true',
+    # index v4(경로 prefix 압축) + untracked cache: 커밋마다 다시 쓰는 인덱스 크기를 줄임
+    'feature.manyFiles': 'true',
+}
+GIT_ENV = {**os.environ, 'GIT_OPTIONAL_LOCKS': '0', 'GIT_CONFIG_COUNT': str(len(_GIT_CONFIG))}
+for _i, (_key, _value) in enumerate(_GIT_CONFIG.items()):
+    GIT_ENV[f'GIT_CONFIG_KEY_{_i}'] = _key
+    GIT_ENV[f'GIT_CONFIG_VALUE_{_i}'] = _value
 
 
 def compute_file_hash(path: Path) -> str:
     """
-    주어진 파일(Path)의 SHA-1 해시를 계산하여 16진수 문자열로 반환.
-    큰 파일도 chunk 단위로 읽어 메모리 과부하를 방지합니다.
+    주어진 파일(Path)의 git blob id(SHA-1 of "blob <size>\\0" + 내용)를 16진수 문자열로 반환.
+    file_cache 키는 git이 이미 알려 주는 blob id를 쓰므로, 이 함수는 PMD 리포트의 파일 경로가
+    요청한 경로와 달라 blob id를 찾지 못했을 때만 같은 키 공간의 값을 직접 계산하는 데 쓰입니다.
+    소스 파일은 작으므로 8KiB chunk 루프 대신 한 번에 읽어 update 한 번으로 해시합니다.
     """
-    h = hashlib.sha1()
-    with path.open('rb') as f:
-        while True:
-            chunk = f.read(8192)
-            if not chunk:
-                break
-            h.update(chunk)
+    data = path.read_bytes()
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
     return h.hexdigest()
 
 
@@ -41,7 +69,8 @@ def load_cache(cache_path: Path) -> dict:
     """
     if cache_path.is_file():
         try:
-            return json.loads(cache_path.read_text(encoding='utf-8'))
+            data = cache_path.read_bytes()
+            return orjson.loads(data) if orjson is not None else json.loads(data)
         except Exception as e:
             logger.warning(f"Failed to load cache from {cache_path}: {e}")
     return {}
@@ -50,40 +79,86 @@ def load_cache(cache_path: Path) -> dict:
 def save_cache(cache_path: Path, cache: dict):
     """
     메모리상의 캐시 맵을 JSON 파일로 저장합니다.
+    결과 파일과 같은 write_json을 써서 orjson(있으면)으로 직렬화하고 임시 파일 교체로 원자적으로 기록합니다.
     """
     try:
-        cache_path.write_text(json.dumps(cache, indent=2), encoding='utf-8')
+        write_json(cache_path, cache)
     except Exception as e:
         logger.error(f"Failed to save cache to {cache_path}: {e}")
 
 
-def get_changed_java_files(prev_hash: str, curr_hash: str, repo_path: Path) -> List[Path]:
+def write_json(path: Path, data):
+    """
+    data를 JSON으로 한 번에 직렬화한 뒤 단일 write로 저장합니다.
+    json.dump는 토큰 조각마다 write를 호출하므로 큰 리포트일수록 호출 수가 많아집니다.
+    orjson이 설치되어 있으면 indent 경로에서도 C로 직렬화합니다.
+    같은 디렉터리의 임시 파일(.tmp)에 쓴 뒤 os.replace로 바꿔치기하므로, 중단된 실행이 남긴 잘린 파일을
+    재실행 시 "이미 처리된 커밋"으로 오인하지 않습니다 (summary는 .json 파일만 읽으므로 .tmp는 무시됨).
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(data, indent=2).encode('utf-8')
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+def list_java_files(repo_path: Path) -> List[Tuple[str, str]]:
     """
-    prev_hash → curr_hash 사이에 변경된 .java 파일들의 절대 경로 리스트를 반환.
-    prev_hash가 None이면, 워크트리 전체의 .java 파일을 반환.
+    작업 트리에서 git이 추적하는 .java 파일의 (상대 경로, blob id) 리스트를 반환.
+    파일 시스템을 순회(rglob)하지 않고 인덱스에서 바로 읽으므로 .git·빌드 산출물 디렉터리를 건드리지 않으며,
+    blob id가 내용 해시를 대신하므로 파일을 읽지 않습니다.
     """
-    if prev_hash is None:
-        # 첫 커밋인 경우: 전체 .java 파일
-        return list(Path(repo_path).rglob("*.java"))
+    result = run_command(['git', 'ls-files', '-s', '-z', '--', '*.java'], cwd=repo_path, check=True)
+    files = []
+    # 항목 형식: "<mode> <blob id> <stage>\t<경로>"
+    for entry in result.stdout.split('\0'):
+        if entry:
+            meta, path = entry.split('\t', 1)
+            files.append((path, meta.split(' ')[1]))
+    return files
+
 
-    # 변경된 파일 목록 조회
+def collect_changed_java_files(commit_hashes: List[str], repo_path: Path) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    연속한 커밋 쌍(이전 → 현재)마다 변경된(ACM) .java 파일의 (상대 경로, 새 blob id) 리스트를 {커밋: 리스트}로 반환.
+    커밋마다 git diff를 띄우지 않고 git diff-tree --stdin 프로세스 하나에 모든 쌍을 넘겨 한 번에 구합니다.
+    .java 변경이 없는 커밋은 dict에 없습니다.
+    이력 전체의 경로를 메모리에 들고 있으므로 Path 대신 str로 보관하고, Path 변환은 워커가 커밋마다 합니다.
+    blob id는 파일 내용의 해시이므로 워커는 file_cache 조회를 위해 파일을 다시 읽어 해시하지 않습니다.
+    """
+    # "<현재> <이전>" 줄을 주면 diff-tree가 현재 커밋 해시를 헤더로 출력한 뒤 변경 파일을 나열
+    # (pathspec으로 .java만 걸러 받으므로 .java 변경이 없는 쌍은 헤더도 출력하지 않음)
+    pairs = ''.join(f"{curr} {prev}\n" for prev, curr in zip(commit_hashes, commit_hashes[1:]))
     result = run_command(
-        ['git', 'diff', '--name-only', '--diff-filter=ACM', prev_hash, curr_hash],
-        cwd=repo_path,
-        check=True
-    )
-    files = result.stdout.splitlines()
-    # .java 확장자만 필터링
-    java_files = [
-        Path(f) for f in files
-        if f.endswith('.java')
-    ]
-    return java_files
+        ['git', 'diff-tree', '--stdin', '-r', '--no-renames', '--diff-filter=ACM', '-z', '--', '*.java'],
+        cwd=repo_path, check=True, decode=False, input=pairs.encode('ascii'))
+    hashes = set(commit_hashes)
+    changed = {}
+    current = None
+    blob = None
+    # -z: 경로를 따옴표로 감싸지 않으므로 비 ASCII 파일명도 그대로 받음
+    # 변경 항목은 ":<옛 mode> <새 mode> <옛 blob> <새 blob> <상태>" 다음 토큰이 경로
+    for token in result.stdout.split(b'\0'):
+        if token.startswith(b':'):
+            blob = token.split(b' ')[3].decode('ascii')
+            continue
+        name = os.fsdecode(token)
+        if blob is not None:
+            changed.setdefault(current, []).append((name, blob))
+            blob = None
+        elif name in hashes:
+            current = name
+    return changed
 
 
-def run_pmd_analysis_http(worktree_path, ruleset, aux_classpath, timeout=600, files: List[str] = None):
+def run_pmd_analysis_http(worktree_path, ruleset, aux_classpath, timeout=600, files: List[str] = None,
+                          cache_path: Path = None):
     """
     PMD Daemon에 HTTP POST 요청을 보내고 JSON 리포트를 dict로 반환.
+    cache_path가 주어지면 데몬은 해당 파일을 PMD 증분 분석 캐시로 사용합니다.
+    워커 안에서는 init_worker가 만든 Session으로 데몬과의 keep-alive 연결을 커밋 간에 재사용합니다.
     """
     url = "http://localhost:8000/analyze"
     payload = {
@@ -91,20 +166,37 @@ def run_pmd_analysis_http(worktree_path, ruleset, aux_classpath, timeout=600, fi
         "ruleset": str(ruleset),
         "auxClasspath": aux_classpath or "",
         # 변경된 파일 목록이 주어지면 해당 파일만 분석
-        **({"files": files} if files is not None else {})
+        **({"files": files} if files is not None else {}),
+        **({"cache": str(cache_path)} if cache_path is not None else {})
     }
-    resp = requests.post(url, json=payload, timeout=timeout)
+    resp = _WORKER.get('http_session', requests).post(url, json=payload, timeout=timeout)
     resp.raise_for_status()
-    return resp.json()
+    return orjson.loads(resp.content) if orjson is not None else resp.json()
 
 
-def run_command(command, cwd=None, check=True, suppress_stderr=False):
+def as_text(output) -> str:
+    """
+    subprocess 출력(bytes 또는 str)을 로그·비교용 문자열로 변환.
+    """
+    return output.decode('utf-8', errors='ignore') if isinstance(output, bytes) else output
+
+
+def run_command(command, cwd=None, check=True, suppress_stderr=False, decode=True, input=None, capture=True):
+    """
+    decode=False면 출력을 bytes 그대로 돌려줍니다. 출력을 쓰지 않는 호출(checkout, worktree add 등)은
+    매번 UTF-8 디코딩할 필요가 없고, 로그로 남길 때만 as_text로 변환합니다.
+    capture=False면 stdout을 /dev/null로 보내 파이프로 읽지 않습니다 (result.stdout은 None).
+    stderr는 오류 판별(index.lock 등)에 쓰이므로 항상 받고, suppress_stderr는 로그 출력만 끕니다.
+    input이 주어지면 명령의 표준 입력으로 전달합니다 (decode에 맞춰 str 또는 bytes).
+    """
     cmd_str = ' '.join(map(str, command))
     command = [str(part) for part in command]
-    logger.debug(f"Running command: {cmd_str} in {cwd or 'default CWD'}")
-    stderr_pipe = subprocess.PIPE if not suppress_stderr else subprocess.DEVNULL
+    logger.debug("Running command: %s in %s", cmd_str, cwd or 'default CWD')
+    stdout_pipe = subprocess.PIPE if capture else subprocess.DEVNULL
+    text_kwargs = {'text': True, 'errors': 'ignore'} if decode else {}
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=False, cwd=cwd, errors='ignore')
+        result = subprocess.run(command, stdout=stdout_pipe, stderr=subprocess.PIPE, check=False, cwd=cwd,
+                                env=GIT_ENV, input=input, **text_kwargs)
 
         log_level_stdout = logging.DEBUG
         log_level_stderr = logging.WARNING
@@ -113,10 +205,10 @@ def run_command(command, cwd=None, check=True, suppress_stderr=False):
             log_level_stderr = logging.ERROR
 
         if result.stdout and (logger.getEffectiveLevel() <= logging.DEBUG or log_level_stdout >= logging.WARNING):
-            logger.log(log_level_stdout, f"Command stdout: {cmd_str}\n{result.stdout.strip()}")
+            logger.log(log_level_stdout, "Command stdout: %s\n%s", cmd_str, as_text(result.stdout).strip())
 
         if result.stderr and not suppress_stderr:
-            logger.log(log_level_stderr, f"Command stderr: {cmd_str}\n{result.stderr.strip()}")
+            logger.log(log_level_stderr, f"Command stderr: {cmd_str}\n{as_text(result.stderr).strip()}")
 
         if check and result.returncode != 0:
             raise subprocess.CalledProcessError(result.returncode, command, output=result.stdout, stderr=result.stderr)
@@ -127,9 +219,9 @@ def run_command(command, cwd=None, check=True, suppress_stderr=False):
         logger.error(f"Command failed: {' '.join(map(str, e.cmd))}")
         logger.error(f"Return code: {e.returncode}")
         if e.stdout:
-            logger.error(f"Failed Command Output: {e.stdout.strip()}")
+            logger.error(f"Failed Command Output: {as_text(e.stdout).strip()}")
         if e.stderr:
-            logger.error(f"Failed Command Error Output: {e.stderr.strip()}")
+            logger.error(f"Failed Command Error Output: {as_text(e.stderr).strip()}")
         if check:
             raise
         return e
@@ -142,10 +234,17 @@ def run_command(command, cwd=None, check=True, suppress_stderr=False):
         raise
 
 
-def get_commit_hashes(repo_path):
+def get_commit_hashes(repo_path, java_only=True):
+    """
+    분석할 커밋 해시 목록을 오래된 순으로 반환.
+    java_only가 True면 .java 파일을 변경한 커밋만 반환합니다 (--full-history로 이력 단순화 없이).
+    """
     logger.info("Retrieving commit hashes...")
+    command = ['git', 'log', '--format=%H', '--reverse']
+    if java_only:
+        command += ['--full-history', '--', '*.java']
     try:
-        result = run_command(['git', 'log', '--format=%H', '--reverse'], cwd=repo_path)
+        result = run_command(command, cwd=repo_path)
         hashes = [h for h in result.stdout.strip().split('\n') if h]
         logger.info(f"Found {len(hashes)} commit hashes.")
         return hashes
@@ -157,184 +256,299 @@ def get_commit_hashes(repo_path):
         return []
 
 
-def analyze_commit(commit_hash, prev_hash, base_repo_path, worktree_path, pmd_path, ruleset, aux_classpath, output_dir,
-                   pmd_results_dir, progress_lock, progress_data, worktree_lock, extra_pmd_flags):
+def count_physical_cores(cpus) -> int:
+    """
+    논리 CPU 번호 집합 cpus가 걸쳐 있는 물리 코어 수를 반환.
+    sysfs 토폴로지를 읽을 수 없으면(리눅스 외 환경 등) 논리 CPU 수를 그대로 반환합니다.
+    """
+    cores = set()
+    try:
+        for cpu in cpus:
+            topology = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+            cores.add(((topology / "physical_package_id").read_text().strip(),
+                       (topology / "core_id").read_text().strip()))
+    except OSError:
+        return len(cpus)
+    return len(cores) or len(cpus)
+
+
+def init_worker(log_queue, worker_config):
+    """
+    Pool initializer: 모든 커밋에 공통인 설정(경로, 룰셋, 카운터 등)을 모듈 전역 _WORKER에 한 번만 보관해
+    task마다 같은 값을 pickle해 보내지 않도록 합니다.
+    워커의 로그 레코드는 큐에 넣기만 하고, 실제 출력은 부모의 QueueListener가 담당합니다
+    (워커들이 stderr 쓰기를 두고 경쟁하지 않음).
+    PMD 데몬 요청용 requests.Session도 워커마다 하나 만들어 커밋마다 TCP 연결을 새로 맺지 않게 합니다.
+    worktree도 워커마다 하나씩 고정 배정해(claim_worktree) task에 worktree 번호를 싣지 않습니다.
+    """
+    _WORKER.update(worker_config)
+    _WORKER['http_session'] = requests.Session()
+    logging.getLogger().handlers[:] = [QueueHandler(log_queue)]
+    _WORKER['worktree_path'] = claim_worktree(worker_config['worktree_paths'])
+    if _WORKER['worktree_path'] is None:
+        logger.critical("[%s] - No free worktree: every worktree is held by another live worker",
+                        current_process().name)
+
+
+def claim_worktree(worktree_paths):
+    """
+    다른 워커가 잡고 있지 않은 worktree 하나를 골라 이 프로세스가 끝날 때까지 배타적으로 잡아 둡니다.
+    worktree 디렉터리에 flock을 걸고 fd를 닫지 않으므로, 워커가 비정상 종료(OOM kill 등)되면 커널이
+    잠금을 풀고 Pool이 새로 띄운 워커가 그 worktree를 이어받습니다. 살아 있는 워커의 worktree는 절대
+    넘겨받지 않으며, 비어 있는 worktree가 없으면 None을 반환합니다.
+    """
+    for wt_path in worktree_paths:
+        fd = os.open(wt_path, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        _WORKER['worktree_lock_fd'] = fd
+        return wt_path
+    return None
+
+
+def mark_processed():
+    """
+    처리한 커밋 수를 공유 메모리 카운터(multiprocessing.Value)에서 1 늘리고 100개마다 진행률을 남깁니다.
+    Manager 프로세스를 거치는 RPC 없이 공유 메모리와 락만 사용합니다.
+    """
+    counter = _WORKER['progress_counter']
+    with counter.get_lock():
+        counter.value += 1
+        processed = counter.value
+    total = _WORKER['total_commits']
+    if processed % 100 == 0 or processed == total:
+        logger.info("[Main] Progress: %d/%d", processed, total)
+
+
+def empty_result(commit_hash):
+    """분석할 .java 파일이 없는 커밋의 결과 JSON 내용."""
+    return {"commit": commit_hash, "num_java_files": 0, "warnings": []}
+
+
+def write_empty_result(commit_hash, result_file):
+    """
+    분석할 .java 파일이 없는 커밋의 빈 결과를 기록하고 analyze_commit의 반환값을 돌려줍니다.
+    """
+    write_json(result_file, empty_result(commit_hash))
+    mark_processed()
+    return commit_hash, 0.0, True, 0, {}
+
+
+def analyze_commit(commit_hash, prev_hash):
+    base_repo_path = _WORKER['base_repo_path']
+    ruleset = _WORKER['ruleset']
+    aux_classpath = _WORKER['aux_classpath']
+    pmd_results_dir = _WORKER['pmd_results_dir']
+    pmd_cache_dir = _WORKER['pmd_cache_dir']
+    worktree_path = _WORKER['worktree_path']
+    if worktree_path is None:
+        # worktree를 공유하면 read-tree가 서로의 index·작업 트리를 덮어쓰므로 조용히 진행하지 않고 실패
+        raise RuntimeError(f"{current_process().name} has no worktree of its own")
+
     success_flag = False
     pmd_code = -1
-    new_cache_dict = {}
 
     worker_name = current_process().name
     start_time = time.time()
     commit_short = commit_hash[:8]
     result_file = pmd_results_dir / f"{commit_hash}.json"
     error_file = pmd_results_dir / f"{commit_hash}.error.json"
+    # 이미 결과가 있는 커밋은 메인 프로세스가 task로 보내지 않음
 
-    # Skip if already done
-    if result_file.exists() or error_file.exists():
-        with progress_lock:
-            progress_data['processed'] += 1
-        return commit_hash, 0.0, True, 0, {}
+    logger.info("[%s] - Processing commit %s", worker_name, commit_short)
 
-    logger.info(f"[{worker_name}] - Processing commit {commit_short}")
+    # Gather only changed Java files since previous commit
+    # (커밋 해시끼리 diff하므로 checkout 전에 확인 가능)
+    # (.java 변경이 없는 커밋은 메인 프로세스가 빈 결과를 기록하고 task로 보내지 않음)
+    rel_paths = None
+    if prev_hash:
+        # 리포지터리 기준 상대경로 리스트 (메인 프로세스가 diff-tree 한 번으로 미리 구해 둠)
+        rel_paths = _WORKER['changed_java_files'][commit_hash]
 
     # Checkout
+    # worktree는 init_worker에서 flock으로 워커마다 하나씩 고정 배정되므로 같은 worktree를 두 프로세스가
+    # 동시에 건드리지 않음 → checkout마다 따로 락을 잡지 않음
     try:
-        with worktree_lock:
-            run_command(['git', 'reset', '--hard', 'HEAD'], cwd=worktree_path,
-                        suppress_stderr=True, check=True)
-            run_command(['git', 'clean', '-fdx'], cwd=worktree_path,
-                        suppress_stderr=True, check=True)
-
-            ok = safe_git_checkout(commit_hash, worktree_path, base_repo_path)
-            if not ok:
-                raise RuntimeError("git checkout failed after lock-cleanup retries")
+        # worktree는 워커마다 재사용되며 read-tree --reset -u 가 추적 파일의 변경을 모두 덮어씀.
+        # PMD 데몬은 리포트를 worktree 밖(tmpfs)에 쓰므로 reset --hard / clean -fdx 는 생략
+        # (sparse checkout과 함께 커밋당 git 프로세스는 read-tree 1회, 변경된 .java 파일만 기록)
+        ok = safe_git_checkout(commit_hash, worktree_path, base_repo_path)
+        if not ok:
+            raise RuntimeError("git checkout failed after lock-cleanup retries")
     except Exception as e:
         logger.error(f"[{worker_name}] - Git checkout failed for {commit_short}: {e}")
-        with open(error_file, 'w', encoding='utf-8') as f:
-            json.dump({"commit": commit_hash, "error": "Git checkout failed"}, f, indent=2)
+        write_json(error_file, {"commit": commit_hash, "error": "Git checkout failed"})
+        mark_processed()
         return commit_hash, 0.0, False, -1, {}
 
-    # Gather only changed Java files since previous commit
-    if prev_hash:
-        # 리포지터리 기준 상대경로 리스트
-        rel_paths = get_changed_java_files(prev_hash, commit_hash, base_repo_path)
-        # worktree_path 기준 실제 파일 객체로 변환
-        java_files = [worktree_path / rel for rel in rel_paths]
-        # 존재하지 않는 파일은 스킵
-        missing = [f for f in java_files if not f.exists()]
-
-        if missing:
-            logger.warning(f"[{worker_name}] - Missing files (skipped): {missing}")
-        java_files = [f for f in java_files if f.exists()]
-    else:
+    if rel_paths is None:
         # 첫 커밋일 땐 전체 파일
-        java_files = list(Path(worktree_path).rglob("*.java"))
+        rel_paths = list_java_files(worktree_path)
+    # (절대경로 str, 상대경로 str, blob id)로 한 번만 만들어 두고 아래 루프에서 재사용
+    # (파일마다 Path 객체 생성·relative_to 대신 문자열 join만 사용, blob id는 git이 알려 준 내용 해시)
+    wt_str = str(worktree_path)
+    java_files = []
+    missing = []
+    for rel, blob in rel_paths:
+        abs_path = os.path.join(wt_str, rel)
+        if os.path.exists(abs_path):
+            java_files.append((abs_path, rel, blob))
+        else:
+            missing.append(abs_path)
+    if missing:
+        # 존재하지 않는 파일은 스킵
+        logger.warning(f"[{worker_name}] - Missing files (skipped): {missing}")
 
     if not java_files:
-        placeholder = {"commit": commit_hash, "num_java_files": 0, "warnings": []}
-        with open(result_file, 'w', encoding='utf-8') as f:
-            json.dump(placeholder, f, indent=2)
-        with progress_lock:
-            progress_data['processed'] += 1
-        return commit_hash, 0.0, True, 0, {}
-
-    # CACHE: 먼저 file_cache(Manager.dict)에서 해시 키로 결과 있는지 확인
+        return write_empty_result(commit_hash, result_file)
+
+    # CACHE: 먼저 워커의 file_cache(일반 dict)에서 blob id로 결과 있는지 확인
     # merged_report 초기화: 실제 java_files 수, warnings 리스트 반영
+    file_cache = _WORKER['file_cache']
+    # 이번 커밋에서 새로 분석한 파일의 캐시 항목: 메인 프로세스로 돌려보내 합침
+    new_cache_entries = {}
 
     merged_report = {
         "commit": commit_hash,
         "num_java_files": len(java_files),
-        "warnings_by_rule": {},
+        "warnings_by_rule": Counter(),
         "warnings": []
     }
     to_analyze = []
+    # PMD 리포트의 파일 경로 → blob id (분석 후 file_cache 키로 재사용)
+    blob_ids = {}
 
-    for f in java_files:
-        # 안전하게 존재 여부 체크
-        if not f.exists():
-            logger.warning(f"[{worker_name}] - Skipping missing file (pre-cache): {f}")
-            continue
-        rel = str(f.relative_to(worktree_path))
-        try:
-            h = compute_file_hash(f)  # CACHE ▶
-        except FileNotFoundError:
-            logger.warning(f"[{worker_name}] - Cannot hash (pre-cache): {f}, skipping")
-            continue
+    for abs_path, rel, h in java_files:
+        blob_ids[abs_path] = h
 
-        if h in file_cache:
-            entry = file_cache[h]
+        entry = file_cache.get(h)
+        if entry is not None:
             # 룰별 카운트를 덧셈으로 합산
-            for rule, cnt in entry["warnings_by_rule"].items():
-                merged_report["warnings_by_rule"][rule] = (
-                        merged_report["warnings_by_rule"].get(rule, 0) + cnt
-                )
-            merged_report["num_java_files"] += entry["num_java_files"]
+            merged_report["warnings_by_rule"].update(entry["warnings_by_rule"])
         else:
             to_analyze.append(rel)
             # 실제 분석이 필요한 파일만 daemon 호출
 
+    raw = {}
     try:
         if not to_analyze:
-            logger.info(f"[{worker_name}] No files to analyze for commit {commit_short}. Skipping PMD call.")
+            logger.info("[%s] No files to analyze for commit %s. Skipping PMD call.", worker_name, commit_short)
         else:
             raw = run_pmd_analysis_http(
                 worktree_path, ruleset, aux_classpath, timeout=600,
-                files=to_analyze
+                files=to_analyze,
+                # worktree마다 고정된 캐시 파일: 같은 worktree의 다음 커밋에서 변경 없는 파일 재분석 생략
+                cache_path=pmd_cache_dir / f"{worktree_path.name}.cache"
             )
 
     except Exception as e:
         # 기존 에러 처리 로직 유지
         logger.error(f"[{worker_name}] - HTTP PMD analysis failed for {commit_short}: {e}")
 
-        with open(error_file, 'w', encoding='utf-8') as f:
-            json.dump({"commit": commit_hash, "error": str(e)}, f, indent=2)
-        with progress_lock:
-            progress_data['processed'] += 1
+        write_json(error_file, {"commit": commit_hash, "error": str(e)})
+        mark_processed()
 
-        return commit_hash, 0.0, False, -1, {}
+        return commit_hash, 0.0, False, -1, new_cache_entries
 
     file_reports = raw.get("fileReports", raw.get("files", []))
 
     for fr in file_reports:
         # PMD가 준 상대경로 얻기
         rel = fr.get("file", fr.get("filename"))
-        file_path = worktree_path / rel
-
-        if not file_path.exists():
-            logger.warning(f"[{worker_name}] - Skipping missing file (post-PMD): {file_path}")
+        if not rel:
+            # 키 이름이 또 다를 경우 로그 남기고 스킵
+            logger.warning(f"Unknown file key in PMD report: {fr.keys()}")
             continue
+        file_path = os.path.join(wt_str, rel)
+
         try:
-            fh = compute_file_hash(file_path)
+            fh = blob_ids.get(file_path) or compute_file_hash(Path(file_path))
         except FileNotFoundError:
             logger.warning(f"[{worker_name}] - Cannot hash (post-PMD): {file_path}, skipping")
             continue
 
-        if not rel:
-            # 키 이름이 또 다를 경우 로그 남기고 스킵
-            logger.warning(f"Unknown file key in PMD report: {fr.keys()}")
-            continue
         # violations 목록에서 rule별 카운트 집계
-        vb = {}
-
-        for v in fr.get("violations", []):
-            rule = v.get("rule") or v.get("ruleSet") or "UNKNOWN"
-            vb[rule] = vb.get(rule, 0) + 1
+        vb = Counter(v.get("rule") or v.get("ruleSet") or "UNKNOWN" for v in fr.get("violations", []))
+        merged_report["warnings_by_rule"].update(vb)
         # 이 해시는 파일 하나이므로 num_java_files=1
-        file_cache[fh] = {
+        entry = {
             "warnings_by_rule": vb,
             "num_java_files": 1
         }
-        # merge violations list
-        if "violations" in raw and isinstance(raw["violations"], list):
-            merged_report["warnings"] = raw["violations"]
+        file_cache[fh] = entry
+        new_cache_entries[fh] = entry
+
+    # merge violations list
+    if "violations" in raw and isinstance(raw["violations"], list):
+        merged_report["warnings"] = raw["violations"]
+    else:
+        # flatten per-file violations
+        vs = []
+        for fr in file_reports:
+            vs.extend(fr.get("violations", []))
+        merged_report["warnings"] = vs
+
+    # carry through metadata and detailed files array
+    for key in ("formatVersion", "pmdVersion", "timestamp", "metrics"):
+        if key in raw:
+            merged_report[key] = raw[key]
+    merged_report["files"] = file_reports
+
+    # write result
+    write_json(result_file, merged_report)
+    success_flag = True
+    pmd_code = 0
+
+    duration = time.time() - start_time
+    # 커밋별 소요 시간 로그
+    logger.info("[%s] Commit %s done in %.2fs", worker_name, commit_short, duration)
+    mark_processed()
+
+    return commit_hash, duration, success_flag, pmd_code, new_cache_entries
+
+
+def analyze_commit_task(task):
+    """imap_unordered용 래퍼: (커밋, 이전 커밋) 튜플을 analyze_commit 인자로 풀어 호출."""
+    return analyze_commit(*task)
+
+
+def fetch_base_repo(base_repo_path):
+    """
+    base repo에서 git fetch를 실행합니다. 실패해도 기존 로컬 리포지터리로 계속 진행합니다.
+    """
+    try:
+        run_command(['git', 'fetch', 'origin', '--prune'], cwd=base_repo_path, check=True, decode=False, capture=False)  # Add prune
+        # 재사용하는 저장소는 가져온 원격 기본 브랜치 이력을 분석하도록 HEAD를 맞춤
+        # (base repo의 작업 트리는 쓰지 않으므로 --soft: partial clone에서 전체 blob을 받지 않음)
+        run_command(['git', 'reset', '-q', '--soft', 'origin/HEAD'], cwd=base_repo_path, check=True, decode=False, capture=False)
+        logger.info("Fetch complete.")
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Fetch failed (code {e.returncode})")
+        logger.error("stderr:\n%s", as_text(e.stderr) or "<empty>")
+    except Exception as e:
+        logger.error(f"Error fetching updates: {e}. Proceeding with existing local repo.")
+
+
+def read_commit_stats(path: Path):
+    """
+    커밋 결과 JSON의 (num_java_files, warnings_by_rule)를 반환.
+    두 키는 warnings·files 배열보다 앞에 기록되므로, ijson이 있으면 두 값을 읽는 즉시 멈추고 나머지는 파싱하지 않습니다.
+    """
+    stats = {}
+    with path.open('rb') as f:
+        if ijson is not None:
+            for key, value in ijson.kvitems(f, ''):
+                if key in ('num_java_files', 'warnings_by_rule'):
+                    stats[key] = value
+                    if len(stats) == 2:
+                        break
         else:
-            # flatten per-file violations
-            vs = []
-            for fr in file_reports:
-                vs.extend(fr.get("violations", []))
-            merged_report["warnings"] = vs
-
-        # carry through metadata and detailed files array
-        for key in ("formatVersion", "pmdVersion", "timestamp", "metrics"):
-            if key in raw:
-                merged_report[key] = raw[key]
-        merged_report["files"] = file_reports
-
-        # write result
-        with open(result_file, 'w') as f:
-            json.dump(merged_report, f, indent=2)
-        success_flag = True
-        pmd_code = 0
-
-        duration = time.time() - start_time
-        # 커밋별 소요 시간 로그
-        logger.info(f"[{worker_name}] Commit {commit_short} done in {duration:.2f}s")
-        with progress_lock:
-            progress_data['processed'] += 1
-            if progress_data['processed'] % 100 == 0 or progress_data['processed'] == progress_data['total']:
-                logger.info(f"[Main] Progress: {progress_data['processed']}/{progress_data['total']}")
-
-        return commit_hash, duration, success_flag, pmd_code, new_cache_dict
+            stats = orjson.loads(f.read()) if orjson is not None else json.load(f)
+    # .java 변경이 없는 커밋의 빈 결과에는 warnings_by_rule이 없음
+    return stats.get('num_java_files', 0), stats.get('warnings_by_rule') or {}
 
 
 def generate_summary_json(output_dir, pmd_results_dir):
@@ -342,32 +556,23 @@ def generate_summary_json(output_dir, pmd_results_dir):
     repository mining 결과를 종합하여 summary.json으로 저장
     """
     summary = {'location': str(pmd_results_dir)}
-    commit_files = list(pmd_results_dir.glob('*.json'))
-    # .error.json 제외
-    commit_files = [f for f in commit_files if not f.name.endswith('.error.json')]
+    # glob 대신 os.scandir로 한 번 훑고 이름만 비교 (.error.json 제외)
+    with os.scandir(pmd_results_dir) as it:
+        commit_files = [Path(entry.path) for entry in it
+                        if entry.name.endswith('.json') and not entry.name.endswith('.error.json')]
     number_of_commits = len(commit_files)
 
     total_java = 0
     total_warnings = 0
-    warnings_count = {}
+    warnings_count = Counter()
 
     for file in commit_files:
-        data = json.load(file.open(encoding='utf-8'))
-        # files 배열 안의 각 fileReport를 직접 순회
-        file_reports = data.get('files', [])
-        num_files = len(file_reports)
-        total_java += num_files
-
-        # 경고는 파일별 violations 배열에서 집계
-
-        for fr in file_reports:
-            vs = fr.get('violations', [])
-            total_warnings += len(vs)
-
-            for v in vs:
-                # v["rule"] 우선, 없으면 ruleSet, 그래도 없으면 UNKNOWN
-                rule = v.get('rule') or v.get('ruleSet') or 'UNKNOWN'
-                warnings_count[rule] = warnings_count.get(rule, 0) + 1
+        # files 배열은 PMD를 새로 돌린 파일만 담으므로 file_cache로 건너뛴 파일까지 반영된
+        # 커밋별 num_java_files / warnings_by_rule을 합산
+        num_java_files, warnings_by_rule = read_commit_stats(file)
+        total_java += num_java_files
+        total_warnings += sum(warnings_by_rule.values())
+        warnings_count.update(warnings_by_rule)
 
     summary['stat_of_repository'] = {
         'number_of_commits': number_of_commits,
@@ -377,12 +582,70 @@ def generate_summary_json(output_dir, pmd_results_dir):
     summary['stat_of_warnings'] = warnings_count
 
     summary_path = output_dir / 'summary.json'
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, indent=2)
+    write_json(summary_path, summary)
     logger.info(f"Saved summary JSON to {summary_path}")
 
 
-def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, ruleset, aux_classpath, num_workers, extra_pmd_flags = None):
+def cleanup_stale_worktrees(base_repo_path, worktrees_base_path, keep_worktrees):
+    """
+    이전 실행이 남긴 wt_* worktree(등록 정보와 디렉터리)를 정리하고, --keep-worktrees면 재사용할
+    worktree 경로 집합을 반환합니다.
+    """
+    logger.info("Cleaning up potentially stale worktrees...")
+    try:
+        run_command(['git', 'worktree', 'prune'], cwd=str(base_repo_path), check=False, suppress_stderr=True)
+    except Exception as e:
+        logger.warning(f"git worktree prune failed (this might be ok if no stale trees exist): {e}")
+
+    existing_wt_dirs = set(
+        item for item in worktrees_base_path.iterdir() if item.is_dir() and item.name.startswith("wt_"))
+    logger.debug(f"Found existing worktree dirs: {existing_wt_dirs}")
+
+    registered_worktrees = set()
+    try:
+        wt_list_result = run_command(['git', 'worktree', 'list', '--porcelain'], cwd=str(base_repo_path), check=True)
+        current_path = None
+        for line in wt_list_result.stdout.splitlines():
+            if line.startswith('worktree '):
+                current_path = Path(line.split(' ', 1)[1])
+                registered_worktrees.add(current_path)
+            elif line == '' and current_path:
+                current_path = None
+        logger.debug(f"Found registered worktrees: {registered_worktrees}")
+    except Exception as e:
+        logger.warning(f"Could not list registered worktrees: {e}")
+
+    # --keep-worktrees: 이전 실행에서 만든 wt_* worktree는 지우지 않고 그대로 재사용
+    reusable_worktrees = set()
+    if keep_worktrees:
+        reusable_worktrees = {wt_path for wt_path in registered_worktrees
+                              if wt_path.name.startswith("wt_") and wt_path.parent == worktrees_base_path.resolve()}
+
+    for wt_path in registered_worktrees - reusable_worktrees:
+        if wt_path.name.startswith("wt_"):
+            logger.warning(f"Attempting to remove registered worktree: {wt_path.name}")
+            try:
+
+                run_command(['git', 'worktree', 'remove', '--force', str(wt_path)], cwd=str(base_repo_path),
+                            check=False, suppress_stderr=True)
+            except Exception as e:
+                logger.error(f"Error removing registered worktree {wt_path.name} using git: {e}")
+
+    for wt_path in existing_wt_dirs:
+        if wt_path.exists() and wt_path.resolve() not in reusable_worktrees:
+            logger.warning(f"Force removing potentially stale worktree directory: {wt_path}")
+            try:
+                shutil.rmtree(wt_path)
+            except OSError as e:
+                logger.error(f"Failed to remove directory {wt_path}: {e}. Analysis might fail.")
+
+    logger.info("Stale worktree cleanup finished.")
+    return reusable_worktrees
+
+
+def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, ruleset, aux_classpath, num_workers, extra_pmd_flags = None,
+                                all_commits=False, scratch_dir=None, oversubscribe=1.0, keep_worktrees=False,
+                                partial_clone=False):
     start_overall_time = time.time()
 
     if extra_pmd_flags is None:
@@ -394,28 +657,46 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
     output_dir.mkdir(parents=True, exist_ok=True)
     logger.info(f"Analysis results will be saved in: {output_dir}")
 
-    base_repo_path = output_dir / "repo_base"
-    worktrees_base_path = output_dir / "worktrees"
+    if keep_worktrees:
+        # 실행 간에 재사용하는 저장소별 작업 공간: base repo·worktree·PMD 캐시를 남겨 두어
+        # 다음 실행은 clone/worktree add 없이 fetch와 증분 checkout만 수행
+        workspace_key = hashlib.sha1(str(repo_location).encode('utf-8')).hexdigest()[:12]
+        workspace_root = Path(output_dir_base) / "workspace" / workspace_key
+        base_repo_path = workspace_root / "repo_base"
+        scratch_root = Path(scratch_dir) / f"pmd_miner_{workspace_key}" if scratch_dir else workspace_root
+        logger.info(f"Reusing persistent workspace: {workspace_root}")
+    else:
+        base_repo_path = output_dir / "repo_base"
+        # worktree와 PMD 캐시는 버려지는 작업 파일이므로 scratch_dir(예: /dev/shm tmpfs)에 둘 수 있음
+        scratch_root = Path(scratch_dir) / f"pmd_miner_{output_dir.name}" if scratch_dir else output_dir
+    worktrees_base_path = scratch_root / "worktrees"
     worktrees_base_path.mkdir(parents=True, exist_ok=True)
     pmd_results_dir = output_dir / "pmd_results"
     pmd_results_dir.mkdir(parents=True, exist_ok=True)
+    pmd_cache_dir = scratch_root / "pmd_cache"
+    pmd_cache_dir.mkdir(parents=True, exist_ok=True)
+    if scratch_dir:
+        logger.info(f"Worktrees and PMD caches will be placed in scratch dir: {scratch_root}")
     cache_path = output_dir / "file_hash_cache.json"
-    file_cache.clear()
-    file_cache.update(load_cache(cache_path))
+    # 파일 캐시는 일반 dict: 워커에는 Pool initializer로 한 번 복사되고(fork면 복사 없이 상속),
+    # 워커가 새로 분석한 항목은 결과와 함께 돌아와 여기서 합쳐짐 (파일마다 Manager RPC 없음)
+    file_cache = load_cache(cache_path)
 
     # --- Repository Setup ---
 
+    fresh_clone = False
+    reusable_worktrees = None
     if base_repo_path.exists() and (base_repo_path / ".git").is_dir():
         run_command(['git', 'worktree', 'prune'], cwd = str(base_repo_path), check = False, suppress_stderr = True)
-        logger.info(f"Base repository exists at {base_repo_path}. Fetching updates...")
-        try:
-            run_command(['git', 'fetch', 'origin', '--prune'], cwd=base_repo_path, check=True)  # Add prune
-            logger.info("Fetch complete.")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Checkout failed (code {e.returncode})")
-            logger.error("stderr:\n%s", e.stderr or "<empty>")
-        except Exception as e:
-            logger.error(f"Error fetching updates: {e}. Proceeding with existing local repo.")
+        logger.info(f"Base repository exists at {base_repo_path}. Fetching updates while cleaning up stale worktrees...")
+        # 네트워크를 기다리는 fetch와 이전 실행의 worktree 정리는 서로 독립적이므로 동시에 진행
+        # (정리는 .git/worktrees/와 worktree 디렉터리만, fetch는 refs·objects·HEAD만 건드림)
+        # fetch가 HEAD를 원격 기본 브랜치로 옮기므로 커밋 목록은 반드시 fetch가 끝난 뒤에 구함
+        # (fetch 도중에 목록을 구하면 새로 받은 커밋이 분석 대상에서 빠짐)
+        with ThreadPoolExecutor(max_workers=1) as fetch_executor:
+            fetch_future = fetch_executor.submit(fetch_base_repo, base_repo_path)
+            reusable_worktrees = cleanup_stale_worktrees(base_repo_path, worktrees_base_path, keep_worktrees)
+            fetch_future.result()
     else:
         if base_repo_path.exists():
             logger.warning(f"Path {base_repo_path} exists but is not a valid git repo. Removing.")
@@ -426,114 +707,128 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
                 exit(1)
         logger.info(f"Cloning repository from {repo_location} to {base_repo_path}...")
         try:
-            run_command(['git', 'clone', repo_location, str(base_repo_path)], check=True)
+            # 분석 대상은 기본 브랜치 이력뿐이므로 다른 브랜치와 태그는 받지 않음
+            # --no-checkout: base repo의 작업 트리는 쓰지 않음
+            clone_cmd = ['git', 'clone', '--single-branch', '--no-tags', '--no-checkout']
+            if partial_clone:
+                # --filter=blob:none(partial clone, 선택): 커밋 목록과 diff-tree는 커밋·트리만 쓰고 *.java sparse
+                # worktree는 다른 blob을 요구하지 않음. 대신 아직 없는 .java blob을 읽는 read-tree마다 원격에서
+                # 그때그때 받아 오고 워커 수만큼 동시에 요청하므로, 원격이 빠르고 .java 이외의 큰 파일이 많은
+                # 저장소에서만 이득 (로컬 경로 clone에서는 --filter가 무시됨)
+                clone_cmd.append('--filter=blob:none')
+            run_command(clone_cmd + [repo_location, str(base_repo_path)],
+                        check=True, decode=False, capture=False)
             logger.info("Base repository cloned successfully.")
+            fresh_clone = True
         except Exception as e:
             logger.critical(f"Failed to clone repository: {e}. Exiting.")
             exit(1)
 
+    if reusable_worktrees is None:
+        if fresh_clone and not any(worktrees_base_path.iterdir()):
+            # 방금 clone한 저장소에 빈 worktree 디렉터리: 정리할 worktree가 있을 수 없으므로 git 호출 생략
+            reusable_worktrees = set()
+        else:
+            reusable_worktrees = cleanup_stale_worktrees(base_repo_path, worktrees_base_path, keep_worktrees)
+
     # --- Get Commits ---
-    commit_hashes = get_commit_hashes(base_repo_path)
+    commit_hashes = get_commit_hashes(base_repo_path, java_only=not all_commits)
     if not commit_hashes:
         logger.error("No commits found or failed to retrieve commits. Exiting.")
         return
     total_commits = len(commit_hashes)
     logger.info(f"Found {total_commits} commits to analyze.")
+    try:
+        changed_java_files = collect_changed_java_files(commit_hashes, base_repo_path)
+    except Exception as e:
+        logger.critical(f"Failed to list changed Java files between commits: {e}. Exiting.")
+        return
+    # 이전 실행에서 결과(.json / .error.json)를 남긴 커밋: 디렉터리를 한 번만 훑어 집합으로 만듦
+    # (커밋마다 워커가 exists()를 두 번 호출하지 않도록)
+    with os.scandir(pmd_results_dir) as it:
+        done_commits = {entry.name.split('.', 1)[0] for entry in it if entry.name.endswith('.json')}
+    # 아직 결과가 없는 커밋 중 첫 커밋(전체 분석)과 .java 파일이 바뀐 커밋만 워커에 보냄
+    task_indices = [i for i, commit_hash in enumerate(commit_hashes)
+                    if commit_hash not in done_commits and (i == 0 or commit_hash in changed_java_files)]
+    logger.info(f"{len(task_indices)} of {total_commits} commits need PMD "
+                f"({len(done_commits)} results already present).")
 
     # --- Worker Setup ---
     if not num_workers:
         try:
-            num_workers = len(os.sched_getaffinity(0))
-            logger.info(f"Using available CPUs: {num_workers}")
+            # taskset/cpuset으로 제한된 환경에서는 호스트 코어 수가 아닌 허용된 CPU 수를 사용
+            # 워커 수 = 데몬의 동시 PMD 분석 수이므로, 하이퍼스레드 형제는 한 코어로 셈
+            num_cpus = count_physical_cores(os.sched_getaffinity(0))
+            logger.info(f"Using available physical cores: {num_cpus}")
         except AttributeError:
-            num_workers = os.cpu_count() or 1
-            logger.info(f"Using CPU count: {num_workers}")
-    num_workers = min(num_workers, total_commits)
+            num_cpus = os.cpu_count() or 1
+            logger.info(f"Using CPU count: {num_cpus}")
+        # 워커는 대부분 git I/O와 데몬 응답을 기다리므로 CPU 수보다 약간 많이 띄우면 유휴 시간을 메울 수 있음
+        num_workers = max(1, round(num_cpus * oversubscribe))
+    num_workers = max(1, min(num_workers, len(task_indices)))
     logger.info(f"Setting number of worker processes to: {num_workers}")
 
-    logger.info("Cleaning up potentially stale worktrees...")
-    try:
-        run_command(['git', 'worktree', 'prune'], cwd=str(base_repo_path), check=False, suppress_stderr=True)
-    except Exception as e:
-        logger.warning(f"git worktree prune failed (this might be ok if no stale trees exist): {e}")
-
-    existing_wt_dirs = set(
-        item for item in worktrees_base_path.iterdir() if item.is_dir() and item.name.startswith("wt_"))
-    logger.debug(f"Found existing worktree dirs: {existing_wt_dirs}")
-
-    registered_worktrees = set()
-    try:
-        wt_list_result = run_command(['git', 'worktree', 'list', '--porcelain'], cwd=str(base_repo_path), check=True)
-        current_path = None
-        for line in wt_list_result.stdout.splitlines():
-            if line.startswith('worktree '):
-                current_path = Path(line.split(' ', 1)[1])
-                registered_worktrees.add(current_path)
-            elif line == '' and current_path:
-                current_path = None
-        logger.debug(f"Found registered worktrees: {registered_worktrees}")
-    except Exception as e:
-        logger.warning(f"Could not list registered worktrees: {e}")
-
-    for wt_path in registered_worktrees:
-        if wt_path.name.startswith("wt_"):
-            logger.warning(f"Attempting to remove registered worktree: {wt_path.name}")
-            try:
-
-                run_command(['git', 'worktree', 'remove', '--force', wt_path.name], cwd=str(base_repo_path),
-                            check=False, suppress_stderr=True)
-            except Exception as e:
-                logger.error(f"Error removing registered worktree {wt_path.name} using git: {e}")
-
-    for wt_path in existing_wt_dirs:
-        if wt_path.exists():
-            logger.warning(f"Force removing potentially stale worktree directory: {wt_path}")
-            try:
-                shutil.rmtree(wt_path)
-            except OSError as e:
-                logger.error(f"Failed to remove directory {wt_path}: {e}. Analysis might fail.")
-
-    logger.info("Stale worktree cleanup finished.")
-
     initial_commit_hash = commit_hashes[0]
     logger.info("Creating fresh worktrees...")
     worktree_paths = []
     for i in range(num_workers):
         wt_path = worktrees_base_path / f"wt_{i}"
         worktree_paths.append(wt_path)
+        if wt_path.resolve() in reusable_worktrees:
+            # sparse checkout 설정이 남아 있으며, 커밋별 read-tree --reset -u 가 내용을 맞춤
+            logger.info(f"Reusing worktree {i} at {wt_path}")
+            continue
         logger.info(f"Creating worktree {i} at {wt_path} linked to {initial_commit_hash[:8]}")
         try:
+            # --no-checkout: 첫 task의 read-tree가 어차피 전체 트리를 쓰므로 생성 시에는 파일을 쓰지 않음
             run_command(
-                ['git', '-C', str(base_repo_path), 'worktree', 'add', '--detach', str(wt_path), initial_commit_hash],
-                check=True)
+                ['git', '-C', str(base_repo_path), 'worktree', 'add', '--detach', '--no-checkout',
+                 str(wt_path), initial_commit_hash],
+                check=True, decode=False, capture=False)
+            # PMD는 .java 파일만 읽으므로 worktree에는 .java 파일만 체크아웃
+            run_command(['git', 'sparse-checkout', 'set', '--no-cone', '*.java'], cwd=wt_path, check=True,
+                        decode=False, capture=False)
         except Exception as e:
             logger.critical(f"Failed to create worktree {i} at {wt_path}. Error: {e}. Exiting.")
-            cleanup_worktrees(base_repo_path, worktrees_base_path, i + 1)
+            if not keep_worktrees:
+                cleanup_worktrees(base_repo_path, worktrees_base_path, i + 1)
             exit(1)
 
-    manager = Manager()
-    progress_data = manager.dict({'processed': 0, 'total': total_commits})
-    progress_lock = manager.Lock()
-    worktree_locks = [manager.Lock() for _ in range(num_workers)]
-
+    # fork: 워커가 모듈을 다시 import하지 않고 부모의 file_cache와 공유 카운터를 복사 없이 그대로 상속
+    # (macOS/Windows의 spawn 기본값, Python 3.14의 forkserver 기본값을 피함)
+    mp_context = get_context('fork' if 'fork' in get_all_start_methods() else None)
+    # 진행 카운터는 Manager 대신 공유 메모리 Value 사용
+    progress_counter = mp_context.Value('i', 0)
+
+    # 커밋마다 달라지지 않는 값은 Pool initializer로 워커당 한 번만 전달
+    worker_config = {
+        'base_repo_path': base_repo_path,
+        'ruleset': ruleset,
+        'aux_classpath': aux_classpath,
+        'pmd_results_dir': pmd_results_dir,
+        'pmd_cache_dir': pmd_cache_dir,
+        'progress_counter': progress_counter,
+        'total_commits': total_commits,
+        'worktree_paths': worktree_paths,
+        'changed_java_files': changed_java_files,
+        'file_cache': file_cache,
+    }
+    # task 튜플은 (커밋, 이전 커밋)만 담음 — worktree는 워커에 고정되어 있으므로 어느 워커가 받아도 됨
+    # chunk는 이력의 연속 구간이라 chunk 안에서는 worktree가 바로 다음 커밋으로만 이동해 read-tree가
+    # 쓰는 파일이 커밋 하나의 변경분뿐이고, 워커당 4개 정도로 나눠 먼저 끝난 워커가 남은 chunk를 가져가게 함
+    block_size = max(1, len(task_indices) // (num_workers * 4))
     pool_args = []
-    for i, commit_hash in enumerate(commit_hashes):
+    for i in task_indices:
         prev_hash = commit_hashes[i - 1] if i > 0 else None
-        pool_args.append((
-            commit_hash,
-            prev_hash,
-            base_repo_path,
-            worktree_paths[i % num_workers],
-            pmd_path,
-            ruleset,
-            aux_classpath,
-            output_dir,
-            pmd_results_dir,
-            progress_lock,
-            progress_data,
-            worktree_locks[i % num_workers],
-            extra_pmd_flags
-        ))
+        pool_args.append((commit_hashes[i], prev_hash))
+
+    # .java 변경이 없는 커밋은 checkout도 PMD도 필요 없으므로 워커를 거치지 않고 여기서 빈 결과를 기록
+    skipped_commits = total_commits - len(task_indices)
+    dispatched = set(task_indices)
+    for i, commit_hash in enumerate(commit_hashes):
+        if i not in dispatched and commit_hash not in done_commits:
+            write_json(pmd_results_dir / f"{commit_hash}.json", empty_result(commit_hash))
+    progress_counter.value = skipped_commits
 
     logger.info(f"Starting analysis with {num_workers} worker processes...")
     results = []
@@ -541,22 +836,28 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
     successful_commits = 0
     pmd_failed_commits = 0
     git_failed_commits = 0
-    skipped_commits = 0
-    pmd_error_codes = {}
+    pmd_error_codes = Counter()
     interrupted = False
+    # 워커 task가 예외를 던지면(worktree를 잡지 못한 워커 등) 일부 커밋만 분석된 것이므로 summary를 만들지 않음
+    pool_failed = False
     pool = None
+    log_listener = None
 
     try:
-        pool = Pool(processes=num_workers)
-        # imap_unordered: 결과가 준비되는 즉시 리턴해 줌
-        results = pool.starmap(analyze_commit, pool_args)
-
-        for i, (commit_hash, duration, success_flag, pmd_code, new_cache) in enumerate(results, start=1):
-
-            # A) 캐시 업데이트
-            file_cache.update(new_cache)
-
-            # B) 기존 로직대로 성공/실패 집계
+        log_queue = mp_context.Queue()
+        log_listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+        log_listener.start()
+        pool = mp_context.Pool(processes=num_workers, initializer=init_worker, initargs=(log_queue, worker_config))
+        # imap_unordered: starmap처럼 전체가 끝날 때까지 기다리지 않고 chunk가 끝나는 대로 결과를 받아
+        # 집계·중간 캐시 저장을 분석과 겹쳐 수행
+        results = pool.imap_unordered(analyze_commit_task, pool_args, chunksize=block_size)
+
+        # 커밋 결과는 pmd_results/에 파일로 남기므로 파이프로는 (커밋, 소요 시간, 성공 여부, 코드)와
+        # 새로 분석한 파일의 캐시 항목만 돌려받음
+        for commit_hash, duration, success_flag, pmd_code, new_cache_entries in results:
+            file_cache.update(new_cache_entries)
+
+            # 기존 로직대로 성공/실패 집계
             if success_flag and duration == 0:
                 skipped_commits += 1
             elif success_flag:
@@ -567,13 +868,13 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
                     git_failed_commits += 1
                 else:
                     pmd_failed_commits += 1
-                    pmd_error_codes[pmd_code] = pmd_error_codes.get(pmd_code, 0) + 1
+                    pmd_error_codes[pmd_code] += 1
             processed = skipped_commits + successful_commits + pmd_failed_commits + git_failed_commits
             # 200 커밋마다 중간 저장 및 로그
             if processed % 200 == 0 or processed == total_commits:
                 logger.info(f"[MainProcess] - Intermediate Progress: {processed}/{total_commits} tasks processed.")
                 logger.info(f"[Main] Saving file-hash cache at {processed} commits")
-                save_cache(cache_path, dict(file_cache))
+                save_cache(cache_path, file_cache)
 
         pool.close()
         pool.join()
@@ -586,6 +887,7 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
             pool.terminate()
         logger.warning("Workers terminated due to interrupt.")
     except Exception as e:
+        pool_failed = True
         logger.error(f"An error occurred during the main analysis pool processing: {e}", exc_info=True)
         if pool:
             pool.terminate()
@@ -596,22 +898,36 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
         if pool:
             pool.close()
             pool.join()
+        if log_listener:
+            # 워커가 남긴 로그 레코드를 모두 출력한 뒤 리스너 종료
+            log_listener.stop()
 
-        save_cache(cache_path, dict(file_cache))
+        save_cache(cache_path, file_cache)
 
-        if interrupted:
-            # 중단 시점의 진행률만 찍기
-            processed = progress_data.get('processed', 0)
-            total = progress_data.get('total', 0)
+        if interrupted or pool_failed:
+            # 중단·실패 시점의 진행률만 찍기 (summary는 만들지 않음)
+            processed = progress_counter.value
+            total = total_commits
             elapsed = time.time() - start_overall_time
             avg_sec = elapsed / processed if processed else 0
             logger.info(f"중단 시점 처리 완료: {processed}/{total} 커밋 (평균 {avg_sec:.2f}s/커밋)")
+            if pool_failed:
+                logger.critical("Analysis pool failed; summary.json was not written. Exiting.")
+                exit(1)
             return
-        else:
-            # 정상 종료 시에만 summary 생성
+        elif keep_worktrees:
+            # worktree는 다음 실행에서 재사용하도록 남겨 둠
             generate_summary_json(output_dir, pmd_results_dir)
+        else:
+            # worktree 삭제는 summary 집계와 무관하므로 백그라운드 스레드에서 동시에 진행
+            with ThreadPoolExecutor(max_workers=1) as janitor:
+                cleanup_future = janitor.submit(cleanup_worktrees, base_repo_path, worktrees_base_path, num_workers)
+                # 정상 종료 시에만 summary 생성
+                generate_summary_json(output_dir, pmd_results_dir)
+                cleanup_future.result()
 
-        cleanup_worktrees(base_repo_path, worktrees_base_path, num_workers)
+            if scratch_dir:
+                shutil.rmtree(scratch_root, ignore_errors=True)
 
     end_overall_time = time.time()
     overall_duration = end_overall_time - start_overall_time
@@ -622,12 +938,12 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
     logger.info("-" * 50)
     logger.info("Analysis Summary:")
     logger.info(f"  Total commits found:        {total_commits}")
-    logger.info(f"  Commits skipped (exists):   {skipped_commits}")
+    logger.info(f"  Commits skipped (no .java/done): {skipped_commits}")
     logger.info(f"  Commits attempted:          {attempted_commits}")
     logger.info(f"  Successfully processed:     {successful_commits}")
     logger.info(f"  PMD execution errors:       {pmd_failed_commits}")
     if pmd_failed_commits > 0:
-        logger.info(f"    PMD Error Codes:        {pmd_error_codes}")
+        logger.info(f"    PMD Error Codes:        {dict(pmd_error_codes)}")
     logger.info(f"  Git/Script errors:        {git_failed_commits}")
     logger.info(f"  Total analysis time:        {overall_duration:.2f} seconds ({num_workers} workers).")
     logger.info(f"  Avg. time / successful commit: {avg_time_successful:.2f} seconds")
@@ -643,6 +959,22 @@ def analyze_repository_parallel(repo_location, output_dir_base, pmd_path, rulese
 
 def cleanup_worktrees(base_repo_path, worktrees_base_path, num_worktrees_to_clean):
     logger.info("Cleaning up worktrees...")
+    # worktree마다 git worktree remove를 부르는 대신 디렉터리를 스레드로 동시에 지우고,
+    # 관리 정보(.git/worktrees/wt_*)는 마지막 git worktree prune 한 번으로 정리
+    wt_paths = [worktrees_base_path / f"wt_{i}" for i in range(num_worktrees_to_clean)]
+    wt_paths = [wt_path for wt_path in wt_paths if wt_path.exists()]
+
+    def remove_dir(wt_path):
+        logger.info(f"Removing worktree directory: {wt_path}")
+        try:
+            shutil.rmtree(wt_path)
+        except OSError as e:
+            logger.error(f"Failed to remove worktree directory {wt_path} during final cleanup: {e}")
+
+    if wt_paths:
+        with ThreadPoolExecutor(max_workers=len(wt_paths)) as executor:
+            list(executor.map(remove_dir, wt_paths))
+
     if not base_repo_path.exists() or not (base_repo_path / ".git").is_dir():
         logger.warning(
             f"Base repository path '{base_repo_path}' does not exist or is not a git repo. Skipping git cleanup.")
@@ -651,25 +983,6 @@ def cleanup_worktrees(base_repo_path, worktrees_base_path, num_worktrees_to_clea
             run_command(['git', '-C', str(base_repo_path), 'worktree', 'prune'], check=False, suppress_stderr=True)
         except Exception as e:
             logger.warning(f"git worktree prune failed during final cleanup: {e}")
-
-        for i in range(num_worktrees_to_clean):
-            wt_name = f"wt_{i}"
-            logger.debug(f"Attempting git worktree remove for {wt_name}")
-            try:
-                run_command(['git', '-C', str(base_repo_path), 'worktree', 'remove', '--force', wt_name], check=False,
-                            suppress_stderr=True)
-            except Exception as e:
-                logger.warning(f"Final git worktree remove command failed for {wt_name}: {e}")
-
-    if worktrees_base_path.exists():
-        for i in range(num_worktrees_to_clean):
-            wt_path = worktrees_base_path / f"wt_{i}"
-            if wt_path.exists():
-                logger.info(f"Removing worktree directory: {wt_path}")
-                try:
-                    shutil.rmtree(wt_path)
-                except OSError as e:
-                    logger.error(f"Failed to remove worktree directory {wt_path} during final cleanup: {e}")
     logger.info("Worktree cleanup finished.")
 
 
@@ -685,11 +998,13 @@ def safe_git_checkout(commit, wt_path, base_repo, retry=2):
     lock = Path(base_repo) / '.git' / 'worktrees' / wt_path.name / 'index.lock'
     for _ in range(retry + 1):
         try:
-            run_command(['git','checkout','-f',commit], cwd=wt_path,
-                        suppress_stderr=True, check=True)
+            # checkout과 달리 ref 해석·HEAD/reflog 갱신·hook 실행 없이 인덱스와 작업 트리만 갱신
+            # (HEAD는 움직이지 않지만 변경 파일 목록은 커밋 해시끼리 diff하므로 영향 없음)
+            run_command(['git','read-tree','--reset','-u',commit], cwd=wt_path,
+                        suppress_stderr=True, check=True, decode=False, capture=False)
             return True
         except subprocess.CalledProcessError as e:
-            if 'index.lock' in (e.stderr or '') and lock.exists():
+            if b'index.lock' in (e.stderr or b'') and lock.exists():
                 lock.unlink(missing_ok=True)
                 time.sleep(0.3)
             else:
@@ -707,8 +1022,22 @@ def main():
     parser.add_argument("-o", "--output-dir", default="analysis_results_parallel",
                         help="Base directory to store analysis results and repository data (timestamped subfolder will be created).")
     parser.add_argument("-r", "--ruleset", required=True, help="Path to the PMD ruleset XML file.")
+    parser.add_argument("--scratch-dir", default=None,
+                        help="Directory for disposable worktrees and PMD caches, e.g. a tmpfs such as /dev/shm "
+                             "(needs roughly largest checkout x workers of free space). Defaults to the output dir.")
     parser.add_argument("-w", "--workers", type=int, default=None,
-                        help="Number of worker processes (defaults to available CPUs).")
+                        help="Number of worker processes (defaults to available physical cores).")
+    parser.add_argument("--oversubscribe", type=float, default=1.0,
+                        help="Workers per available physical core when --workers is not given "
+                             "(e.g. 1.25 to overlap git I/O, 2.0 to use both hyperthreads).")
+    parser.add_argument("--partial-clone", action="store_true",
+                        help="Clone with --filter=blob:none; blobs are then fetched from the remote on demand "
+                             "during each worktree checkout (only worthwhile for repos with many large non-Java blobs).")
+    parser.add_argument("--keep-worktrees", action="store_true",
+                        help="Keep the cloned repo, worktrees and PMD caches under <output-dir>/workspace "
+                             "and reuse them on the next run of the same repository.")
+    parser.add_argument("--all-commits", action="store_true",
+                        help="Analyze every commit, not only the ones that modify .java files.")
     parser.add_argument("--pmd-debug", action="store_true", help="Pass --debug to PMD")
     parser.add_argument("--strict-errors", action="store_true", help="PMD --fail-on-processing-error")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging.")
@@ -743,6 +1072,9 @@ def main():
     ])
 
     output_dir_base = Path(args.output_dir).resolve()
+    # worktree는 git -C <base repo>로 만들고 PMD 캐시 경로는 데몬에 그대로 전달되므로 절대경로로 고정
+    # (상대경로면 git은 base repo 기준, 데몬은 자기 cwd 기준으로 해석해 서로 다른 위치를 가리킴)
+    scratch_dir = Path(args.scratch_dir).expanduser().resolve() if args.scratch_dir else None
 
     logger.info(f"Using ruleset: {ruleset_path}")
 
@@ -750,7 +1082,10 @@ def main():
     try:
         analyze_repository_parallel(repo_location=args.repo_location, output_dir_base=output_dir_base,
                                     pmd_path="/app/pmd-daemon.jar", ruleset=ruleset_path, aux_classpath=aux_classpath,
-                                    num_workers=args.workers, extra_pmd_flags=build_pmd_flags(args))
+                                    num_workers=args.workers, extra_pmd_flags=build_pmd_flags(args),
+                                    all_commits=args.all_commits, scratch_dir=scratch_dir,
+                                    oversubscribe=args.oversubscribe, keep_worktrees=args.keep_worktrees,
+                                    partial_clone=args.partial_clone)
     except subprocess.CalledProcessError as cpe:
         if cpe.returncode == 4:  # only processing errors
             logger.warning("PMD processing errors encountered (exit 4) – continuing.")
@@ -8,6 +8,7 @@ import net.sourceforge.pmd.PMDConfiguration;
 import net.sourceforge.pmd.PmdAnalysis;
 import net.sourceforge.pmd.lang.LanguageVersion;
 import net.sourceforge.pmd.lang.java.JavaLanguageModule;
+import net.sourceforge.pmd.lang.rule.RuleSet;
 
 import java.io.IOException;
 import java.io.OutputStream;
@@ -16,15 +17,38 @@ import java.nio.file.Files;
 import java.nio.file.Path;
 import java.util.List;
 import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.Executors;
 import java.util.stream.Collectors;
 
 public class PmdDaemon {
+    // 임시 리포트 파일 위치: 가능하면 RAM 기반 tmpfs, 아니면 JVM 기본 임시 디렉터리
+    private static final Path REPORT_DIR = Files.isDirectory(Path.of("/dev/shm")) && Files.isWritable(Path.of("/dev/shm"))
+            ? Path.of("/dev/shm")
+            : Path.of(System.getProperty("java.io.tmpdir"));
+
+    // 파싱된 룰셋 캐시: 키는 룰셋 경로(+파일이면 수정 시각). 요청마다 룰셋 XML을 다시 파싱하지 않음
+    private static final Map<String, RuleSet> RULESET_CACHE = new ConcurrentHashMap<>();
+
+    private static RuleSet loadRuleSet(PmdAnalysis analysis, String ruleset) throws IOException {
+        Path rulesetPath = Path.of(ruleset);
+        String key = Files.isRegularFile(rulesetPath)
+                ? ruleset + "@" + Files.getLastModifiedTime(rulesetPath).toMillis()
+                : ruleset;
+        RuleSet cached = RULESET_CACHE.computeIfAbsent(key, k -> analysis.newRuleSetLoader().loadFromResource(ruleset));
+        // Rule 인스턴스는 분석 중 상태를 가질 수 있으므로 동시 요청끼리 공유하지 않도록 깊은 복사본을 사용
+        return new RuleSet(cached);
+    }
+
     public static void main(String[] args) throws IOException {
 
         String host = "0.0.0.0";
         int port = 8000;
         String cachePath = null;
         boolean ignoreErrors = false;
+        int threads = Runtime.getRuntime().availableProcessors();
+        // 요청 하나(PMD 분석 하나)가 쓰는 분석 스레드 수. 미지정 시 아래에서 요청 스레드 수에 맞춰 결정
+        int analysisThreads = -1;
 
         for (int i = 0; i < args.length; i++) {
             switch (args[i]) {
@@ -40,11 +64,23 @@ public class PmdDaemon {
                 case "--ignore-errors":
                     ignoreErrors = true;
                     break;
+                case "--threads":
+                    threads = Integer.parseInt(args[++i]);
+                    break;
+                case "--analysis-threads":
+                    analysisThreads = Integer.parseInt(args[++i]);
+                    break;
                 default:
             }
         }
         final String _cachePath = cachePath;
         final boolean _ignoreErrors = ignoreErrors;
+        // 요청 스레드가 여럿이면 요청마다 PMD 기본값(≈CPU 수)만큼 분석 스레드를 띄워
+        // 요청 스레드 수 × CPU 수만큼 과다 구독되므로, 이때는 요청당 1개로 제한 (병렬성은 요청 스레드가 담당)
+        if (analysisThreads < 0 && threads > 1) {
+            analysisThreads = 1;
+        }
+        final int _analysisThreads = analysisThreads;
 
         // 1) 포트 설정 및 HTTP 서버 생성
         HttpServer server = HttpServer.create(new InetSocketAddress(port), 0);
@@ -61,6 +97,8 @@ public class PmdDaemon {
             String path = (String) reqMap.get("path");
             String ruleset = (String) reqMap.get("ruleset");
             String auxCP = (String) reqMap.getOrDefault("auxClasspath", "");
+            // 요청별 캐시 파일 (워커/worktree마다 고정된 경로를 보내면 커밋 간 증분 분석 캐시를 재사용)
+            String requestCache = (String) reqMap.get("cache");
 
             // 변경된 파일 리스트 (증분분석용)
             @SuppressWarnings("unchecked")
@@ -69,6 +107,9 @@ public class PmdDaemon {
             // 3) PMD 설정
             PMDConfiguration configuration = new PMDConfiguration();
             configuration.setDefaultLanguageVersion(JavaLanguageModule.getInstance().getLatestVersion());
+            if (_analysisThreads >= 0) {
+                configuration.setThreads(_analysisThreads);
+            }
 
             if (files != null && !files.isEmpty()) {
                 // 증분분석: 전달된 상대경로 목록만 분석
@@ -81,17 +122,24 @@ public class PmdDaemon {
             } else {
                 configuration.addInputPath(Path.of(path));
             }
-            configuration.addRuleSet(ruleset);
             configuration.setReportFormat("json");
-            Path reportFile = Path.of(path, "pmd-report.json");
+            // 리포트는 응답 직후 삭제되므로 tmpfs(/dev/shm)에 임시 파일로 기록
+            Path reportFile = Files.createTempFile(REPORT_DIR, "pmd-report-", ".json");
             configuration.setReportFile(reportFile);
 
 
-            // 캐시 사용
-            if (_cachePath != null) {
-                configuration.setAnalysisCacheLocation(_cachePath);
-                // 캐시 파싱 에러 무시
-                if (_ignoreErrors) {
+            // 캐시 사용: 요청별 캐시가 있으면 우선 사용하고, 없으면 데몬 전역 --cache
+            boolean useRequestCache = requestCache != null && !requestCache.isBlank();
+            String cacheLocation = useRequestCache ? requestCache : _cachePath;
+            if (cacheLocation != null) {
+                configuration.setAnalysisCacheLocation(cacheLocation);
+            }
+            // --ignore-errors: 어느 캐시를 쓰든 같은 configuration에 적용
+            if (_ignoreErrors) {
+                // 파싱에 실패한 파일 등 처리 오류는 리포트에만 남기고 요청 자체는 실패시키지 않음
+                configuration.setFailOnError(false);
+                // 캐시 파싱 에러 무시 (전역 캐시 파일은 기존처럼 증분 분석을 끔)
+                if (!useRequestCache && _cachePath != null) {
                     configuration.setIgnoreIncrementalAnalysis(true);
                 }
             }
@@ -102,33 +150,42 @@ public class PmdDaemon {
             }
 
 
-            // 4) 분석 실행
-            try (PmdAnalysis analysis = PmdAnalysis.create(configuration)) {
-                analysis.performAnalysis();
-            } catch (Exception e) {
-                String err = e.toString() + "\n" +
-                        java.util.Arrays.stream(e.getStackTrace())
-                                .map(Object::toString)
-                                .collect(Collectors.joining("\n"));
-                byte[] b = ("{ \"error\": \"" + err.replace("\"","\\\"") + "\" }").getBytes();
+            try {
+                // 4) 분석 실행
+                try (PmdAnalysis analysis = PmdAnalysis.create(configuration)) {
+                    analysis.addRuleSet(loadRuleSet(analysis, ruleset));
+                    analysis.performAnalysis();
+                } catch (Exception e) {
+                    String err = e.toString() + "\n" +
+                            java.util.Arrays.stream(e.getStackTrace())
+                                    .map(Object::toString)
+                                    .collect(Collectors.joining("\n"));
+                    byte[] b = ("{ \"error\": \"" + err.replace("\"","\\\"") + "\" }").getBytes();
+                    exchange.getResponseHeaders().set("Content-Type", "application/json");
+                    exchange.sendResponseHeaders(500, b.length);
+                    try (OutputStream os = exchange.getResponseBody()) {
+                        os.write(b);
+                    }
+                    return;
+                }
+
+                // 5) 결과 파일 읽어 응답
+                byte[] responseBody = Files.readAllBytes(reportFile);
                 exchange.getResponseHeaders().set("Content-Type", "application/json");
-                exchange.sendResponseHeaders(500, b.length);
+                exchange.sendResponseHeaders(200, responseBody.length);
                 try (OutputStream os = exchange.getResponseBody()) {
-                    os.write(b);
+                    os.write(responseBody);
                 }
-                return;
-            }
-
-            // 5) 결과 파일 읽어 응답
-            byte[] responseBody = Files.readAllBytes(reportFile);
-            exchange.getResponseHeaders().set("Content-Type", "application/json");
-            exchange.sendResponseHeaders(200, responseBody.length);
-            try (OutputStream os = exchange.getResponseBody()) {
-                os.write(responseBody);
+            } finally {
+                Files.deleteIfExists(reportFile);
             }
         });
 
-        System.out.printf("PMD Daemon listening on http://%s:%d/analyze%n", host, port);
+        // 요청마다 별도 스레드에서 분석: 여러 워커의 요청이 직렬화되지 않고 동시에 처리됨
+        server.setExecutor(Executors.newFixedThreadPool(threads));
+
+        System.out.printf("PMD Daemon listening on http://%s:%d/analyze (%d threads, %s analysis threads per request)%n",
+                host, port, threads, _analysisThreads >= 0 ? String.valueOf(_analysisThreads) : "default");
         server.start();
     }
 }